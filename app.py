@@ -6,84 +6,162 @@ from datetime import datetime
 import io
 import json
 
+from constants import (
+    ALL_METRICS, CBHI_ACHIEVEMENT_COLS, CBHI_PLAN, INSTITUTIONS,
+    METRIC_INDEX, METRICS_GROUPS_ITEMS
+)
+
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Densa PHCU Reporting", layout="wide")
 
-# --- CBHI PLAN DATA (STATIC) ---
-# Plan for [higher paid, medium paid, free, new membership]
-CBHI_PLAN = {
-    "Densa HC /Merged Health Post": {"higher paid": 453, "medium paid": 551, "free": 474, "new membership": 251},
-    "02 Densa Zuriya Health Post": {"higher paid": 147, "medium paid": 316, "free": 155, "new membership": 0},
-    "03 Derew Health Post": {"higher paid": 456, "medium paid": 557, "free": 478, "new membership": 429},
-    "04 Wejed Health Post": {"higher paid": 246, "medium paid": 346, "free": 249, "new membership": 0},
-    "06 Gert Health Post": {"higher paid": 237, "medium paid": 298, "free": 255, "new membership": 22},
-    "07 Lenguat Health Post": {"higher paid": 240, "medium paid": 328, "free": 244, "new membership": 0},
-    "08 Alegeta Health Post": {"higher paid": 217, "medium paid": 252, "free": 248, "new membership": 22},
-    "09 Sensa Health Post": {"higher paid": 173, "medium paid": 272, "free": 179, "new membership": 0}
-}
-
-# --- CONSTANTS ---
-INSTITUTIONS = list(CBHI_PLAN.keys())
-
-METRICS_GROUPS = {
-    "Family Planning": [
-        "All forms of Family planning accepted", "Long term Family planning accepted",
-        "IUCD provided", "Immediate Postpartum Family Planning Service Provided"
-    ],
-    "Maternal Health": [
-        "Pregnant women Screened", "ANC 1st contact service given",
-        "ANC 4th contact service given", "ANC 8th contact service given",
-        "Pregnant Mothers send to Health Center for skilled Birth", "Home Delivery happened",
-        "Skilled Birth Attended", "Postnatal Care Service Provided",
-        "Maternal conference conducted (1=Yes/0=No)", "number of Maternal conference participants"
-    ],
-    "Disease Prevention": [
-        "Household visited", "Improved Latrine at visited household",
-        "Unimproved Latrine at visited household", "presumptive TB case screened",
-        "presumptive TB cases sent to HC for investigation"
-    ],
-    "Child Health": [
-        "<5 children Treated for Pneumonia", "<5 children Treated for Diarrhea",
-        "<5 children screened for acute malnutritional", "6–59 month children supplemented with Vitamin A",
-        "24-29 month children Dewormed"
-    ],
-    "CBHI": [
-        "CBHI membership renewal (higher paid)", "CBHI membership renewal (medium paid)",
-        "CBHI membership renewal (free)", "CBHI new membership",
-        "CBHI money collected (ETB)", "CBHI money saved to bank (ETB)"
-    ]
-}
+# Static plan table, built once at import since the plan never changes at runtime
+PLAN_COLS = ['Plan Higher Paid', 'Plan Medium Paid', 'Plan Free', 'Plan New Membership']
+PLAN_DF = (
+    pd.DataFrame.from_dict(CBHI_PLAN, orient='index')
+    .rename(columns={'higher paid': 'Plan Higher Paid', 'medium paid': 'Plan Medium Paid',
+                     'free': 'Plan Free', 'new membership': 'Plan New Membership'})
+    .reset_index()
+    .rename(columns={'index': 'Institution'})
+)
+PLAN_DF['Total Plan'] = PLAN_DF[PLAN_COLS].sum(axis=1)
+
 
-ALL_METRICS = []
-for group in METRICS_GROUPS.values():
-    ALL_METRICS.extend(group)
-ALL_METRICS.append("Total CBHI (Auto)")
+def _col_letter(n):
+    """Convert a 1-based column number to its A1-notation letter(s)."""
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# Sheet layout: Date, Reporter Name, Reporter Phone, Institution, Timestamp, then one
+# column per metric. Fetching an explicit range instead of get_all_records() keeps the
+# payload to a single 2-D list (no repeated dict keys per row).
+META_COLUMNS = 5
+SHEET_RANGE = f"A1:{_col_letter(META_COLUMNS + len(ALL_METRICS))}"
 
 
 # --- GOOGLE SHEET CONNECTION (UPDATED TO USE json_key) ---
-@st.cache_data(ttl=3600) # Cache data for 1 hour
+SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+
+
+@st.cache_resource # Authorize once per process, not on every rerun
+def _get_client():
+    # USE THE NEW SINGLE JSON KEY from secrets.toml
+    # This line reads the large JSON string from secrets and converts it to a Python dictionary
+    json_info = json.loads(st.secrets["gcp_service_account"]["json_key"])
+
+    # Use the dictionary directly for authorization, which avoids all stream/key errors
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(json_info, SCOPE)
+    return gspread.authorize(creds)
+
+
+@st.cache_resource # Open the spreadsheet once and reuse the Worksheet handle
 def get_google_sheet():
     try:
-        import json # Crucial import
-        
-        # USE THE NEW SINGLE JSON KEY from secrets.toml
-        # This line reads the large JSON string from secrets and converts it to a Python dictionary
-        json_info = json.loads(st.secrets["gcp_service_account"]["json_key"])
-        
-        scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        
-        # Use the dictionary directly for authorization, which avoids all stream/key errors
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(json_info, scope)
-        client = gspread.authorize(creds)
-        
         sheet_url = st.secrets["private_gsheets_url"]["url"]
-        sheet = client.open_by_url(sheet_url).sheet1
+        sheet = _get_client().open_by_url(sheet_url).sheet1
         return sheet
     except Exception as e:
         # We handle the error here for better user feedback
         st.error(f"❌ Connection Error: {e}. Check Streamlit Secrets and Google Sheet sharing.")
         st.stop()
 
+
+@st.cache_data(ttl=60) # Skip the Sheets round-trip for repeat interactions within a minute
+def load_dataframe():
+    """Fetch all report rows as a DataFrame via a single values_get call."""
+    sheet = get_google_sheet()
+    # FORMATTED_STRING keeps the Date column human-readable; without it,
+    # UNFORMATTED_VALUE would return date cells as raw day serials
+    resp = sheet.spreadsheet.values_get(
+        f"{sheet.title}!{SHEET_RANGE}",
+        params={"valueRenderOption": "UNFORMATTED_VALUE",
+                "dateTimeRenderOption": "FORMATTED_STRING"}
+    )
+    values = resp.get("values", [])
+    if len(values) < 2:
+        return pd.DataFrame()
+    header = [str(c).strip() for c in values[0]]
+    # The API trims trailing empty cells, so pad short rows back to full width
+    rows = [row + [0] * (len(header) - len(row)) for row in values[1:]]
+    df = pd.DataFrame(rows, columns=header)
+    if 'Institution' in df.columns:
+        # Only 8 distinct institutions: categorical codes store 1 byte per row
+        # and make the multiselect isin() an integer compare
+        df['Institution'] = pd.Categorical(df['Institution'], categories=INSTITUTIONS)
+    return df
+
+
+@st.cache_data(ttl=60)
+def load_cbhi_frame():
+    """Fetch only the Institution column plus the 4 CBHI achievement columns."""
+    sheet = get_google_sheet()
+    cbhi_start = META_COLUMNS + 1 + ALL_METRICS.index(CBHI_ACHIEVEMENT_COLS[0])
+    ranges = [
+        f"{sheet.title}!{_col_letter(META_COLUMNS - 1)}2:{_col_letter(META_COLUMNS - 1)}",
+        f"{sheet.title}!{_col_letter(cbhi_start)}2:{_col_letter(cbhi_start + 3)}",
+    ]
+    resp = sheet.spreadsheet.values_batch_get(
+        ranges, params={"valueRenderOption": "UNFORMATTED_VALUE"}
+    )
+    inst_vals = resp["valueRanges"][0].get("values", [])
+    cbhi_vals = resp["valueRanges"][1].get("values", [])
+    if not inst_vals:
+        return pd.DataFrame()
+
+    # Ranges are trimmed independently by the API, so pad both to the same length
+    n_rows = max(len(inst_vals), len(cbhi_vals))
+    inst_vals += [[]] * (n_rows - len(inst_vals))
+    cbhi_vals += [[]] * (n_rows - len(cbhi_vals))
+    df = pd.DataFrame(
+        [row + [0] * (4 - len(row)) for row in cbhi_vals], columns=CBHI_ACHIEVEMENT_COLS
+    )
+    df['Institution'] = [row[0] if row else "" for row in inst_vals]
+    return df
+
+@st.fragment # Keystrokes in the form rerun only this fragment, not the whole script
+def entry_form(report_date, reporter_name, reporter_phone, institution):
+    with st.form("entry_form"):
+        # Metric order is fixed, so write widget values straight into their slot
+        values = [0] * len(ALL_METRICS)
+        for category, indicators in METRICS_GROUPS_ITEMS:
+            st.subheader(f"🔹 {category}")
+            cols = st.columns(3)
+            for i, ind in enumerate(indicators):
+                # Skip the Auto-calculated metric in the form
+                if ind == "Total CBHI (Auto)": continue
+                values[METRIC_INDEX[ind]] = cols[i%3].number_input(ind, min_value=0, step=1)
+
+        submitted = st.form_submit_button("Submit Report")
+
+        if submitted:
+            with st.spinner("Saving to Google Sheet..."):
+                # --- CALCULATION: Total CBHI (Sum of 4 membership types) ---
+                total_cbhi = sum(values[METRIC_INDEX[c]] for c in CBHI_ACHIEVEMENT_COLS)
+                values[METRIC_INDEX["Total CBHI (Auto)"]] = total_cbhi
+                # -----------------------------------------------------------
+
+                sheet = get_google_sheet()
+                row_data = [
+                    str(report_date), reporter_name, reporter_phone, institution,
+                    datetime.now().isoformat(),
+                    *values
+                ]
+
+                # table_range pins the append target so gspread skips the extra
+                # metadata round-trip that locates the table bounds
+                # RAW stores the phone as a literal string; USER_ENTERED would let
+                # Sheets parse it as a number and drop the leading zero
+                sheet.append_rows([row_data], value_input_option="RAW", table_range="A1")
+                # Clear just the record caches so the dashboards see the new data
+                # immediately without dropping unrelated caches
+                load_dataframe.clear()
+                load_cbhi_frame.clear()
+                st.success(f"✅ Report Submitted! Total CBHI calculated: {total_cbhi}")
+
+
 # --- MAIN APP LOGIC (NOW PUBLICLY ACCESSIBLE) ---
 st.title("🏥 Densa PHCU Report System")
 page = st.sidebar.radio("Navigate", ["📝 Data Entry", "📊 Dashboard", "📈 CBHI Performance Report"])
@@ -104,39 +182,7 @@ if page == "📝 Data Entry":
     institution = st.selectbox("Select Health Institution", INSTITUTIONS)
     
     if reporter_name and reporter_phone:
-        with st.form("entry_form"):
-            data_values = {}
-            for category, indicators in METRICS_GROUPS.items():
-                st.subheader(f"🔹 {category}")
-                cols = st.columns(3)
-                for i, ind in enumerate(indicators):
-                    # Skip the Auto-calculated metric in the form
-                    if ind == "Total CBHI (Auto)": continue
-                    data_values[ind] = cols[i%3].number_input(ind, min_value=0, step=1)
-            
-            submitted = st.form_submit_button("Submit Report")
-            
-            if submitted:
-                with st.spinner("Saving to Google Sheet..."):
-                    # --- CALCULATION: Total CBHI (Sum of 4 membership types) ---
-                    total_cbhi = (
-                        data_values.get("CBHI membership renewal (higher paid)", 0) +
-                        data_values.get("CBHI membership renewal (medium paid)", 0) +
-                        data_values.get("CBHI membership renewal (free)", 0) +
-                        data_values.get("CBHI new membership", 0)
-                    )
-                    data_values["Total CBHI (Auto)"] = total_cbhi
-                    # -----------------------------------------------------------
-
-                    sheet = get_google_sheet()
-                    row_data = [str(report_date), reporter_name, reporter_phone, institution, str(datetime.now())]
-                    for m in ALL_METRICS:
-                        row_data.append(data_values.get(m, 0))
-                    
-                    sheet.append_row(row_data)
-                    # Clear cache to ensure dashboard sees the new data immediately
-                    st.cache_data.clear() 
-                    st.success(f"✅ Report Submitted! Total CBHI calculated: {total_cbhi}")
+        entry_form(report_date, reporter_name, reporter_phone, institution)
     else:
         st.warning("⚠️ Enter Name and Phone to enable the form.")
 
@@ -146,15 +192,11 @@ if page == "📝 Data Entry":
 elif page == "📊 Dashboard":
     st.header("General Daily Report Dashboard")
     if st.button("🔄 Refresh Data"):
-        st.cache_data.clear()
+        load_dataframe.clear()
+
+    df = load_dataframe()
 
-    sheet = get_google_sheet()
-    data = sheet.get_all_records()
-    df = pd.DataFrame(data)
-    
     if not df.empty:
-        df.columns = [c.strip() for c in df.columns] 
-        
         col1, col2 = st.columns(2)
         with col1:
             filter_inst = st.multiselect("Filter Institution", INSTITUTIONS)
@@ -175,15 +217,46 @@ elif page == "📊 Dashboard":
         
         sum_metrics = [m for m in ALL_METRICS if "money" not in m] # Exclude money fields from general summation
         
-        numeric_df = df_filtered[sum_metrics]
-        numeric_df = numeric_df.apply(pd.to_numeric, errors='coerce').fillna(0)
+        # Interior blank cells arrive as "" even with UNFORMATTED_VALUE, so keep
+        # coercing hand-edited sheet data to numbers. uint16 is plenty for these
+        # small non-negative counts and quarters the bytes the sum has to move
+        numeric_df = (
+            df_filtered[sum_metrics]
+            .apply(pd.to_numeric, errors='coerce')
+            .fillna(0)
+            .astype('uint16')
+        )
         
         total_row = numeric_df.sum().to_frame(name="TOTAL SUM")
         st.table(total_row)
         
+        csv = df_filtered.to_csv(index=False).encode('utf-8')
+        st.download_button("📥 Download Report as CSV", data=csv, file_name="Densa_Report.csv", mime="text/csv")
+
+        # Columnar format for data-science consumers: pyarrow's C++ writer is far
+        # faster than cell-by-cell xlsx XML and compresses much smaller. Arrow
+        # rejects object columns mixing ints and "" blanks, so export a
+        # type-normalized copy: numeric metrics, string meta columns
+        parquet_df = df_filtered.copy()
+        metric_cols = [m for m in ALL_METRICS if m in parquet_df.columns]
+        parquet_df[metric_cols] = (
+            parquet_df[metric_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
+        )
+        meta_cols = [c for c in parquet_df.columns if c not in metric_cols]
+        parquet_df[meta_cols] = parquet_df[meta_cols].astype(str)
+        st.download_button(
+            "📥 Download Report as Parquet",
+            data=parquet_df.to_parquet(index=False, compression='zstd'),
+            file_name="Densa_Report.parquet",
+            mime="application/vnd.apache.parquet"
+        )
+
         output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_filtered.to_excel(writer, index=False)
+        # constant_memory mode is off limits here: to_excel writes column-major,
+        # and constant_memory discards writes to already-flushed rows
+        with pd.ExcelWriter(output, engine='xlsxwriter',
+                            engine_kwargs={'options': {'strings_to_numbers': False}}) as writer:
+            df_filtered.to_excel(writer, index=False, sheet_name='Report')
         st.download_button("📥 Download Report as Excel", data=output.getvalue(), file_name="Densa_Report.xlsx")
     else:
         st.info("No data found.")
@@ -195,24 +268,19 @@ elif page == "📈 CBHI Performance Report":
     st.header("CBHI Performance Analysis (Plan vs. Achievement)")
     st.info("This report aggregates all submitted data to measure performance against the static plan.")
 
-    sheet = get_google_sheet()
-    data = sheet.get_all_records()
-    df = pd.DataFrame(data)
-    
+    df = load_cbhi_frame()
+
     if df.empty:
         st.warning("No data submitted yet to generate the performance report.")
         st.stop()
 
     # 1. AGGREGATE ACHIEVEMENT (SUM)
-    cbhi_achievement_cols = [
-        "CBHI membership renewal (higher paid)", "CBHI membership renewal (medium paid)", 
-        "CBHI membership renewal (free)", "CBHI new membership"
-    ]
-    
-    df_achieved = df.copy()
-    df_achieved[cbhi_achievement_cols] = df_achieved[cbhi_achievement_cols].apply(pd.to_numeric, errors='coerce').fillna(0)
-    
-    df_aggregated = df_achieved.groupby('Institution')[cbhi_achievement_cols].sum().reset_index()
+    # Interior blank cells arrive as "" even with UNFORMATTED_VALUE, so coerce
+    # rather than astype directly to tolerate hand-edited sheet data
+    df_achieved = df[CBHI_ACHIEVEMENT_COLS].apply(pd.to_numeric, errors='coerce').fillna(0)
+    df_achieved['Institution'] = df['Institution']
+
+    df_aggregated = df_achieved.groupby('Institution', sort=False, as_index=False)[CBHI_ACHIEVEMENT_COLS].sum()
     df_aggregated.rename(columns={
         'CBHI membership renewal (higher paid)': 'Achieved Higher Paid',
         'CBHI membership renewal (medium paid)': 'Achieved Medium Paid',
@@ -220,26 +288,16 @@ elif page == "📈 CBHI Performance Report":
         'CBHI new membership': 'Achieved New Membership'
     }, inplace=True)
 
-    # 2. PREPARE PLAN DATA
-    plan_data = pd.DataFrame([
-        {'Institution': k, 
-         'Plan Higher Paid': v['higher paid'],
-         'Plan Medium Paid': v['medium paid'],
-         'Plan Free': v['free'],
-         'Plan New Membership': v['new membership']}
-        for k, v in CBHI_PLAN.items()
-    ])
-    
-    # 3. MERGE AND CALCULATE
-    df_final = pd.merge(plan_data, df_aggregated, on='Institution', how='left').fillna(0)
-    
-    df_final['Total Plan'] = df_final['Plan Higher Paid'] + df_final['Plan Medium Paid'] + df_final['Plan Free'] + df_final['Plan New Membership']
-    df_final['Total Achieved'] = df_final['Achieved Higher Paid'] + df_final['Achieved Medium Paid'] + df_final['Achieved Free'] + df_final['Achieved New Membership']
+    # 2. MERGE AND CALCULATE (plan side is precomputed in PLAN_DF)
+    df_final = pd.merge(PLAN_DF, df_aggregated, on='Institution', how='left').fillna(0)
+
+    achieved_cols = ['Achieved Higher Paid', 'Achieved Medium Paid', 'Achieved Free', 'Achieved New Membership']
+    df_final['Total Achieved'] = df_final[achieved_cols].sum(axis=1)
 
     df_final['Performance %'] = (df_final['Total Achieved'] / df_final['Total Plan']) * 100
     df_final['Performance %'] = df_final['Performance %'].apply(lambda x: f"{x:,.1f}%")
 
-    # 4. DISPLAY
+    # 3. DISPLAY
     display_cols = ['Institution', 'Total Plan', 'Total Achieved', 'Performance %',
                     'Plan Higher Paid', 'Achieved Higher Paid', 'Plan Medium Paid', 
                     'Achieved Medium Paid', 'Plan Free', 'Achieved Free', 
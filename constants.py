@@ -0,0 +1,60 @@
+"""Shared static data for the Densa PHCU report app.
+
+Everything here is immutable and built once at import, so Streamlit's
+per-interaction script reruns only ever reference prebuilt objects.
+"""
+from types import MappingProxyType
+
+# --- CBHI PLAN DATA (STATIC) ---
+# Plan for [higher paid, medium paid, free, new membership]
+CBHI_PLAN = MappingProxyType({
+    "Densa HC /Merged Health Post": {"higher paid": 453, "medium paid": 551, "free": 474, "new membership": 251},
+    "02 Densa Zuriya Health Post": {"higher paid": 147, "medium paid": 316, "free": 155, "new membership": 0},
+    "03 Derew Health Post": {"higher paid": 456, "medium paid": 557, "free": 478, "new membership": 429},
+    "04 Wejed Health Post": {"higher paid": 246, "medium paid": 346, "free": 249, "new membership": 0},
+    "06 Gert Health Post": {"higher paid": 237, "medium paid": 298, "free": 255, "new membership": 22},
+    "07 Lenguat Health Post": {"higher paid": 240, "medium paid": 328, "free": 244, "new membership": 0},
+    "08 Alegeta Health Post": {"higher paid": 217, "medium paid": 252, "free": 248, "new membership": 22},
+    "09 Sensa Health Post": {"higher paid": 173, "medium paid": 272, "free": 179, "new membership": 0}
+})
+
+INSTITUTIONS = tuple(CBHI_PLAN)
+
+METRICS_GROUPS = MappingProxyType({
+    "Family Planning": [
+        "All forms of Family planning accepted", "Long term Family planning accepted",
+        "IUCD provided", "Immediate Postpartum Family Planning Service Provided"
+    ],
+    "Maternal Health": [
+        "Pregnant women Screened", "ANC 1st contact service given",
+        "ANC 4th contact service given", "ANC 8th contact service given",
+        "Pregnant Mothers send to Health Center for skilled Birth", "Home Delivery happened",
+        "Skilled Birth Attended", "Postnatal Care Service Provided",
+        "Maternal conference conducted (1=Yes/0=No)", "number of Maternal conference participants"
+    ],
+    "Disease Prevention": [
+        "Household visited", "Improved Latrine at visited household",
+        "Unimproved Latrine at visited household", "presumptive TB case screened",
+        "presumptive TB cases sent to HC for investigation"
+    ],
+    "Child Health": [
+        "<5 children Treated for Pneumonia", "<5 children Treated for Diarrhea",
+        "<5 children screened for acute malnutritional", "6–59 month children supplemented with Vitamin A",
+        "24-29 month children Dewormed"
+    ],
+    "CBHI": [
+        "CBHI membership renewal (higher paid)", "CBHI membership renewal (medium paid)",
+        "CBHI membership renewal (free)", "CBHI new membership",
+        "CBHI money collected (ETB)", "CBHI money saved to bank (ETB)"
+    ]
+})
+METRICS_GROUPS_ITEMS = tuple(METRICS_GROUPS.items())
+
+# Flattened once at import time; Streamlit reruns the script on every interaction
+ALL_METRICS = (*(ind for group in METRICS_GROUPS.values() for ind in group), "Total CBHI (Auto)")
+METRIC_INDEX = {m: i for i, m in enumerate(ALL_METRICS)}
+
+CBHI_ACHIEVEMENT_COLS = [
+    "CBHI membership renewal (higher paid)", "CBHI membership renewal (medium paid)",
+    "CBHI membership renewal (free)", "CBHI new membership"
+]